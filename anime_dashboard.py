@@ -1,16 +1,29 @@
 import streamlit as st
+import html
+import os
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 from image_handler import AnimeImageHandler
+from anime_data import CSV_PATH, PARQUET_PATH, DATA_COLUMNS, read_anime_csv, parquet_is_current
 
 # Load data
 @st.cache_data
 def load_data():
-    df = pd.read_csv("popular_anime.csv")
-    df['release_date'] = pd.to_datetime(df['release_date'], errors='coerce')
-    # Remove timezone (if any)
-    df['release_date'] = df['release_date'].dt.tz_localize(None)
+    # Prefer the Parquet copy (built by build_parquet.py), which already has parsed dtypes,
+    # unless the CSV has been edited since it was built
+    if parquet_is_current():
+        df = pd.read_parquet(PARQUET_PATH, columns=DATA_COLUMNS)
+    else:
+        if os.path.exists(PARQUET_PATH):
+            print(f"{PARQUET_PATH} is older than {CSV_PATH}, reading the CSV (run build_parquet.py to refresh)")
+        df = read_anime_csv()
     df = df.dropna(subset=['release_date'])
+    # Downcast members to shrink the cached frame and the filter/sort passes
+    # (sentiment_score stays float64 so averages land exactly on the 0.4/0.6 thresholds)
+    df['members'] = pd.to_numeric(df['members'], downcast='unsigned')
+    # Sort once so date windows can be taken as contiguous slices
+    df = df.sort_values('release_date').reset_index(drop=True)
     return df
 
 def get_sentiment_info(score):
@@ -22,8 +35,101 @@ def get_sentiment_info(score):
     else:
         return "Negative", "#dc3545"
 
-# Initialize image handler
-image_handler = AnimeImageHandler()
+def render_anime_card(anime, image_uri, image_width=280):
+    """Return the HTML for one anime card (image, title, info and sentiment)"""
+    sentiment_label, sentiment_color = get_sentiment_info(anime.sentiment_score)
+    title = html.escape(str(anime.title))
+    url = html.escape(str(anime.url), quote=True)
+    
+    # ANIME IMAGE (First key element)
+    if image_uri:
+        image_html = f'<img src="{image_uri}" alt="{title}" width="{image_width}" style="border-radius: 5px;">'
+    else:
+        image_html = '<div style="padding: 15px; border-radius: 5px; background-color: #e8f0fe;">Image not available</div>'
+    
+    # No indentation or blank lines, or markdown would break the HTML block
+    return (
+        '<div class="anime-card">'
+        f'<div style="flex: 0 0 {image_width}px;">{image_html}</div>'
+        '<div style="flex: 1;">'
+        # ANIME TITLE (Second key element)
+        f'<h2><a href="{url}" target="_blank">{title}</a></h2>'
+        f'<p><strong>Release Date:</strong> {anime.release_date.strftime("%B %d, %Y")} | '
+        f'<strong>Members:</strong> {anime.members:,} | '
+        f'<strong>Episodes:</strong> {anime.episodes} | '
+        f'<strong>Type:</strong> {html.escape(str(anime.type))}</p>'
+        f'<p><strong>Genres:</strong> {html.escape(str(anime.genres))}</p>'
+        # SENTIMENT DESCRIPTION (Third key element)
+        f'<div style="background-color: {sentiment_color}20; border-left: 4px solid {sentiment_color}; '
+        'padding: 15px; margin: 15px 0; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">'
+        f'<h4 style="margin: 0; color: {sentiment_color};">'
+        f'Sentiment: {sentiment_label} ({anime.sentiment_score:.2f})</h4>'
+        '<p style="margin: 10px 0 0 0; font-style: italic; line-height: 1.4;">'
+        f'<strong>AI Analysis:</strong> {html.escape(str(anime.reasoning_text))}</p>'
+        '</div>'
+        '</div>'
+        '</div>'
+        "<hr style='margin: 30px 0; border: 1px solid #eee;'>"
+    )
+
+# Cached filter stages. The loaded frame is static, so it is passed as
+# `_df` to skip hashing it and each stage is keyed on the widget values only.
+@st.cache_data(show_spinner=False, max_entries=16)
+def filter_by_date(_df, start_date, end_date):
+    """Return anime released between start_date and end_date (inclusive)"""
+    # df is sorted by release_date, so the window is a slice
+    release_dates = _df['release_date'].to_numpy()
+    lo = np.searchsorted(release_dates, pd.Timestamp(start_date).to_datetime64())
+    hi = np.searchsorted(release_dates, pd.Timestamp(end_date).to_datetime64(), side='right')
+    return _df.iloc[lo:hi]
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def apply_sentiment_filter(_df, start_date, end_date, sentiment_filter):
+    """Return the date window restricted to the selected sentiment bucket"""
+    filtered_df = filter_by_date(_df, start_date, end_date)
+    if sentiment_filter == "Positive (≥0.6)":
+        filtered_df = filtered_df[filtered_df['sentiment_score'] >= 0.6]
+    elif sentiment_filter == "Neutral (0.4-0.6)":
+        filtered_df = filtered_df[(filtered_df['sentiment_score'] >= 0.4) & (filtered_df['sentiment_score'] < 0.6)]
+    elif sentiment_filter == "Negative (<0.4)":
+        filtered_df = filtered_df[filtered_df['sentiment_score'] < 0.4]
+    return filtered_df
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def top_sorted(_df, start_date, end_date, sentiment_filter, sort_option, top_n):
+    """Return the top_n filtered anime in the selected sort order"""
+    filtered_df = apply_sentiment_filter(_df, start_date, end_date, sentiment_filter)
+    # Break ties by members, since the loaded frame is in release date order
+    if sort_option == "Earliest release date first":
+        filtered_df = filtered_df.sort_values(by=['release_date', 'members'], ascending=[True, False])
+    elif sort_option == "Highest sentiment score":
+        filtered_df = filtered_df.sort_values(by=['sentiment_score', 'members'], ascending=[False, False])
+    else:
+        filtered_df = filtered_df.sort_values(by='members', ascending=False)
+    return filtered_df.head(top_n)
+
+# Styling shared by every anime card
+ANIME_CARD_STYLE = """
+    <style>
+    .anime-card {
+        border: 1px solid #ddd;
+        border-radius: 10px;
+        padding: 20px;
+        margin: 15px 0;
+        background-color: #f9f9f9;
+        color: #31333F;
+        display: flex;
+        gap: 20px;
+    }
+    </style>
+"""
+
+# Initialize image handler once and share it (session, indices) across reruns
+@st.cache_resource
+def get_image_handler():
+    return AnimeImageHandler()
+
+image_handler = get_image_handler()
 
 # Load data
 df = load_data()
@@ -71,41 +177,21 @@ with st.sidebar:
     )
 
 # Apply filters
-mask = (df['release_date'] >= pd.to_datetime(start_date)) & (df['release_date'] <= pd.to_datetime(end_date))
-filtered_df = df.loc[mask].copy()
-
-# Apply sentiment filter
-if sentiment_filter != "All":
-    if sentiment_filter == "Positive (≥0.6)":
-        filtered_df = filtered_df[filtered_df['sentiment_score'] >= 0.6]
-    elif sentiment_filter == "Neutral (0.4-0.6)":
-        filtered_df = filtered_df[(filtered_df['sentiment_score'] >= 0.4) & (filtered_df['sentiment_score'] < 0.6)]
-    elif sentiment_filter == "Negative (<0.4)":
-        filtered_df = filtered_df[filtered_df['sentiment_score'] < 0.4]
-
-# Apply sorting
-if sort_option == "Earliest release date first":
-    filtered_df = filtered_df.sort_values(by='release_date', ascending=True)
-elif sort_option == "Highest sentiment score":
-    filtered_df = filtered_df.sort_values(by='sentiment_score', ascending=False)
-else:
-    filtered_df = filtered_df.sort_values(by='members', ascending=False)
-
-filtered_df = filtered_df.head(top_n)
+filtered_df = top_sorted(df, start_date, end_date, sentiment_filter, sort_option, top_n)
 
 # Display filters summary
 st.markdown(f"### Showing top {top_n} anime released between **{start_date}** and **{end_date}**")
 
 # Key metrics
+avg_sentiment = filtered_df['sentiment_score'].mean()
+sentiment_label, _ = get_sentiment_info(avg_sentiment)
+
 col1, col2, col3 = st.columns(3)
 with col1:
-    avg_sentiment = filtered_df['sentiment_score'].mean()
-    sentiment_label, _ = get_sentiment_info(avg_sentiment)
     st.metric("Average Sentiment", f"{avg_sentiment:.2f}", f"{sentiment_label}")
 
 with col2:
-    avg_score = filtered_df['sentiment_score'].mean()
-    st.metric("Avg Sentiment Score", f"{avg_score:.2f}")
+    st.metric("Avg Sentiment Score", f"{avg_sentiment:.2f}")
 
 with col3:
     total_anime = len(filtered_df)
@@ -114,73 +200,19 @@ with col3:
 # Anime list with three key elements
 st.markdown("## Anime List")
 
-# Create a container for the anime list
-container = st.container()
-
-with container:
-    for idx, anime in filtered_df.iterrows():
-        # Create a bordered container for each anime
-        with st.container():
-            # Add some styling
-            st.markdown("""
-                <style>
-                .anime-card {
-                    border: 1px solid #ddd;
-                    border-radius: 10px;
-                    padding: 20px;
-                    margin: 15px 0;
-                    background-color: #f9f9f9;
-                }
-                </style>
-            """, unsafe_allow_html=True)
-            
-            # Create columns for layout
-            col1, col2 = st.columns([1, 3])
-            
-            with col1:
-                # ANIME IMAGE (First key element)
-                image_handler.display_image(anime['url'], anime['title'], width=280)
-            
-            with col2:
-                # ANIME TITLE (Second key element)
-                st.markdown(f"## [{anime['title']}]({anime['url']})")
-                
-                # Basic info with better formatting
-                st.markdown(f"""
-                **Release Date:** {anime['release_date'].strftime('%B %d, %Y')} | 
-                **Members:** {anime['members']:,} | 
-                **Episodes:** {anime['episodes']} | 
-                **Type:** {anime['type']}
-                """)
-                
-                st.markdown(f"**Genres:** {anime['genres']}")
-                
-                # SENTIMENT DESCRIPTION (Third key element)
-                sentiment_label, sentiment_color = get_sentiment_info(anime['sentiment_score'])
-                
-                # Create a prominent sentiment display
-                st.markdown(f"""
-                <div style="
-                    background-color: {sentiment_color}20; 
-                    border-left: 4px solid {sentiment_color}; 
-                    padding: 15px; 
-                    margin: 15px 0; 
-                    border-radius: 5px;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                ">
-                    <h4 style="margin: 0; color: {sentiment_color};">
-                        Sentiment: {sentiment_label} ({anime['sentiment_score']:.2f})
-                    </h4>
-                    <p style="margin: 10px 0 0 0; font-style: italic; line-height: 1.4;">
-                        <strong>AI Analysis:</strong> {anime['reasoning_text']}
-                    </p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-               
-        
-        # Add separator with better styling
-        st.markdown("<hr style='margin: 30px 0; border: 1px solid #eee;'>", unsafe_allow_html=True)
+# Add card styling once for the whole list
+st.markdown(ANIME_CARD_STYLE, unsafe_allow_html=True)
+
+# Fetch any missing images in parallel; only the list below waits on this
+image_paths = image_handler.prefetch(filtered_df)
+
+# Build every card up front and send the list as a single element
+# (images were resolved by prefetch, so this only reads from disk)
+cards_html = [
+    render_anime_card(anime, image_handler.get_image_data_uri(image_paths.get(anime.url)))
+    for anime in filtered_df.itertuples(index=False)
+]
+st.markdown("".join(cards_html), unsafe_allow_html=True)
 
 # Footer with additional info
 st.markdown("---")
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""Reading and cleaning of the anime dataset, shared by the dashboard and build_parquet.py.
+
+Kept free of Streamlit calls so it can be imported from plain scripts.
+"""
+import os
+
+import pandas as pd
+
+CSV_PATH = "popular_anime.csv"
+PARQUET_PATH = "popular_anime.parquet"
+
+# Columns the dashboard actually displays
+DATA_COLUMNS = ['title', 'url', 'release_date', 'type', 'genres', 'episodes',
+                'members', 'sentiment_score', 'reasoning_text']
+
+
+def read_anime_csv(path=CSV_PATH):
+    """Read the anime CSV with parsed release dates and compact dtypes"""
+    df = pd.read_csv(path, usecols=DATA_COLUMNS)
+    # Explicit format keeps parsing on the vectorized path instead of per-row dateutil
+    df['release_date'] = pd.to_datetime(df['release_date'], format='%Y-%m-%dT%H:%M:%S%z', errors='coerce')
+    # Remove timezone (if any)
+    df['release_date'] = df['release_date'].dt.tz_localize(None)
+    df['type'] = df['type'].astype('category')
+    return df
+
+
+def parquet_is_current(csv_path=CSV_PATH, parquet_path=PARQUET_PATH):
+    """Return True if the Parquet copy exists and is at least as new as the CSV"""
+    if not os.path.exists(parquet_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+    return os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
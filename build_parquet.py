@@ -0,0 +1,17 @@
+"""Convert popular_anime.csv to Parquet with pre-parsed dtypes.
+
+Run once whenever popular_anime.csv changes:
+
+    python build_parquet.py
+"""
+from anime_data import PARQUET_PATH, read_anime_csv
+
+
+def main():
+    df = read_anime_csv()
+    df.to_parquet(PARQUET_PATH, compression='zstd', index=False)
+    print(f"Wrote {len(df)} rows to {PARQUET_PATH}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,13 @@
+import argparse
 import requests
 import os
-import streamlit as st
+import json
+import base64
 import time
 import re
+import threading
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 
 class AnimeImageHandler:
@@ -12,10 +17,69 @@ class AnimeImageHandler:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
         }
+        # Shared session keeps connections alive between requests
+        self.session = requests.Session()
+        
+        # Jikan rate limiting, shared by all download threads
+        self.jikan_interval = 0.5  # 500ms between API requests
+        self._jikan_lock = threading.Lock()
+        self._last_jikan_request = 0.0
         
         # Create images directory if it doesn't exist
         if not os.path.exists(self.images_dir):
             os.makedirs(self.images_dir)
+        
+        # Resolved Jikan image URLs keyed by MAL ID, persisted across restarts
+        self._jikan_index_path = os.path.join(self.images_dir, '_jikan_index.json')
+        self._jikan_index_lock = threading.Lock()
+        self._jikan_index = self._load_jikan_index()
+        
+        # Local image files keyed by MAL ID, so lookups skip per-file stat calls
+        self._image_index = self._scan_images_dir()
+        # Base64 data URIs keyed by image path, so each file is encoded once
+        self._data_uris = {}
+    
+    def _scan_images_dir(self):
+        """Index existing non-empty images by MAL ID in a single directory walk"""
+        image_index = {}
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                match = re.search(r'_(\d+)\.jpg$', entry.name)
+                if match and entry.is_file() and entry.stat().st_size > 0:
+                    image_index[int(match.group(1))] = entry.path
+        return image_index
+    
+    def _load_jikan_index(self):
+        """Load the saved MAL ID -> image URL index, if any"""
+        try:
+            with open(self._jikan_index_path) as f:
+                return {int(mal_id): url for mal_id, url in json.load(f).items()}
+        except (OSError, ValueError) as e:
+            if os.path.exists(self._jikan_index_path):
+                print(f"Error loading Jikan index {self._jikan_index_path}: {e}")
+            return {}
+    
+    def _write_jikan_index(self):
+        """Persist the Jikan index to disk (caller must hold _jikan_index_lock)"""
+        try:
+            tmp_path = f"{self._jikan_index_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._jikan_index, f)
+            os.replace(tmp_path, self._jikan_index_path)
+        except OSError as e:
+            print(f"Error saving Jikan index {self._jikan_index_path}: {e}")
+    
+    def _save_jikan_url(self, mal_id, image_url):
+        """Record a resolved image URL and persist the index to disk"""
+        with self._jikan_index_lock:
+            self._jikan_index[mal_id] = image_url
+            self._write_jikan_index()
+    
+    def _forget_jikan_url(self, mal_id):
+        """Drop a resolved image URL (e.g. a dead link) so Jikan is queried again"""
+        with self._jikan_index_lock:
+            if self._jikan_index.pop(mal_id, None) is not None:
+                self._write_jikan_index()
     
     def _extract_mal_id(self, mal_url):
         """Extract MyAnimeList ID from URL"""
@@ -43,7 +107,7 @@ class AnimeImageHandler:
                 if attempt > 0:
                     time.sleep(1)
                 
-                response = requests.get(url, headers=self.headers, timeout=15, stream=True)
+                response = self.session.get(url, headers=self.headers, timeout=15, stream=True)
                 if response.status_code == 200:
                     # Check if it's actually an image
                     content_type = response.headers.get('content-type', '')
@@ -67,14 +131,33 @@ class AnimeImageHandler:
         
         return False
     
+    def _wait_for_jikan(self):
+        """Block until the next Jikan API request is allowed"""
+        with self._jikan_lock:
+            delay = self._last_jikan_request + self.jikan_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_jikan_request = time.monotonic()
+    
     def _get_image_from_jikan(self, mal_id):
+        """Get anime image URL, querying Jikan only if it is not already known"""
+        image_url = self._jikan_index.get(mal_id)
+        if image_url:
+            return image_url
+        
+        image_url = self._fetch_image_from_jikan(mal_id)
+        if image_url:
+            self._save_jikan_url(mal_id, image_url)
+        return image_url
+    
+    def _fetch_image_from_jikan(self, mal_id):
         """Get anime image URL using Jikan API"""
         try:
             # Rate limiting - be respectful to the API
-            time.sleep(0.5)  # 500ms delay between requests
+            self._wait_for_jikan()
             
             api_url = f"https://api.jikan.moe/v4/anime/{mal_id}"
-            response = requests.get(api_url, timeout=10)
+            response = self.session.get(api_url, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -94,7 +177,7 @@ class AnimeImageHandler:
             elif response.status_code == 429:  # Rate limited
                 print(f"Rate limited, waiting longer for MAL ID {mal_id}")
                 time.sleep(2)  # Wait 2 seconds and try once more
-                return self._get_image_from_jikan(mal_id)
+                return self._fetch_image_from_jikan(mal_id)
                 
         except Exception as e:
             print(f"Error getting image from Jikan API for MAL ID {mal_id}: {e}")
@@ -109,10 +192,16 @@ class AnimeImageHandler:
             print(f"Could not extract MAL ID from {mal_url}")
             return None
         
+        # Check the in-memory index first
+        image_path = self._image_index.get(mal_id)
+        if image_path:
+            return image_path
+        
         filename = self._sanitize_filename(anime_title, mal_id)
         
         # Check if image already exists locally and is valid
         if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            self._image_index[mal_id] = filename
             return filename
         
         # If file exists but is empty, remove it
@@ -124,25 +213,71 @@ class AnimeImageHandler:
         if image_url:
             # Download and save image
             if self._download_image(image_url, filename):
+                self._image_index[mal_id] = filename
                 return filename
+            # The saved URL may be dead; re-resolve it on the next attempt
+            self._forget_jikan_url(mal_id)
         
         return None
     
-    def display_image(self, mal_url, anime_title, width=250):
-        """Display anime image in Streamlit, downloading if necessary"""
-        image_path = self.get_anime_image_path(mal_url, anime_title)
+    def prefetch(self, anime_df, max_workers=8):
+        """Download missing images for every anime in a DataFrame in parallel
         
-        if image_path and os.path.exists(image_path):
+        Returns a dict mapping each MAL URL to its local image path (None if unavailable).
+        """
+        rows = list(zip(anime_df['url'], anime_df['title']))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            image_paths = list(executor.map(lambda row: self.get_anime_image_path(*row), rows))
+        return {mal_url: image_path for (mal_url, _), image_path in zip(rows, image_paths)}
+    
+    def _image_mime_type(self, data):
+        """Guess image MIME type from file header (Jikan may serve webp)"""
+        if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+            return 'image/webp'
+        if data[:8] == b'\x89PNG\r\n\x1a\n':
+            return 'image/png'
+        return 'image/jpeg'
+    
+    def get_image_data_uri(self, image_path):
+        """Get a local anime image as a base64 data URI for inline HTML (never downloads)"""
+        if not image_path:
+            return None
+        
+        data_uri = self._data_uris.get(image_path)
+        if data_uri is None:
             try:
-                # Display with better quality settings
-                st.image(image_path, width=width, use_container_width=False)
-                return True
-            except Exception as e:
-                print(f"Error displaying image {image_path}: {e}")
-                # If image is corrupted, remove it
-                if os.path.exists(image_path):
-                    os.remove(image_path)
-        
-        # Show placeholder if no image available
-        st.info("Image not available")
-        return False
\ No newline at end of file
+                with open(image_path, 'rb') as f:
+                    data = f.read()
+            except OSError as e:
+                print(f"Error reading image {image_path}: {e}")
+                # Drop the stale entry so the next prefetch downloads it again
+                for mal_id, indexed_path in list(self._image_index.items()):
+                    if indexed_path == image_path:
+                        self._image_index.pop(mal_id, None)
+                return None
+            
+            encoded = base64.b64encode(data).decode('ascii')
+            data_uri = f"data:{self._image_mime_type(data)};base64,{encoded}"
+            self._data_uris[image_path] = data_uri
+        
+        return data_uri
+
+
+def main():
+    """Download images for every anime in a CSV so the dashboard only reads from disk"""
+    parser = argparse.ArgumentParser(description="Preload anime images into the local image cache")
+    parser.add_argument('--preload', metavar='CSV', required=True,
+                        help="CSV file with 'url' and 'title' columns (e.g. popular_anime.csv)")
+    parser.add_argument('--images-dir', default='anime_images', help="Directory to store images in")
+    parser.add_argument('--workers', type=int, default=8, help="Number of parallel downloads")
+    args = parser.parse_args()
+    
+    anime_df = pd.read_csv(args.preload, usecols=['url', 'title'])
+    handler = AnimeImageHandler(images_dir=args.images_dir)
+    image_paths = handler.prefetch(anime_df, max_workers=args.workers)
+    available = sum(1 for image_path in image_paths.values() if image_path)
+    print(f"{available} of {len(image_paths)} images available in {handler.images_dir}")
+
+
+if __name__ == '__main__':
+    main()